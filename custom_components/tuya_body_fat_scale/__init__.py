@@ -2,7 +2,6 @@
 from __future__ import annotations
 
 import logging
-from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import Platform
@@ -12,6 +11,7 @@ from homeassistant.exceptions import ConfigEntryNotReady
 from .const import (
     DOMAIN,
     CONF_SCAN_INTERVAL,
+    CONF_USERS,
     DEFAULT_SCAN_INTERVAL,
 )
 from .coordinator import TuyaScaleDataUpdateCoordinator
@@ -28,6 +28,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         
         # Create API instance
         api = TuyaScaleAPI(hass, dict(entry.data))
+        await api.async_load_token()
+        api.async_start_token_refresh()
+        entry.async_on_unload(api.async_stop_token_refresh)
 
         # If this is first setup or migrating from old setup, ensure scan_interval is in options
         if CONF_SCAN_INTERVAL in entry.data and not entry.options.get(CONF_SCAN_INTERVAL):
@@ -77,13 +80,14 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     # Get the coordinator
     coordinator = hass.data[DOMAIN][entry.entry_id]
     
+    # Options saves also land here; only rebuild when the users themselves changed
+    if entry.data.get(CONF_USERS, {}) != coordinator.user_data:
+        coordinator.rebuild_user_cache()
+
     # Update the update_interval
-    coordinator.update_interval = timedelta(
-        seconds=entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
+    coordinator.set_scan_interval(
+        entry.options.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)
     )
     
     # Trigger an immediate refresh
     await coordinator.async_refresh()
-
-    # Reload the config entry to apply changes
-    await hass.config_entries.async_reload(entry.entry_id)
@@ -11,15 +11,31 @@ import time
 import hmac
 import hashlib
 import json
-from datetime import datetime, timedelta
+from array import array
+from functools import lru_cache
 import asyncio
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential
+import aiohttp
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 
-from homeassistant.core import HomeAssistant
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode('utf-8')
+
+    _json_loads = json.loads
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.storage import Store
 
 from .const import (
+    DOMAIN,
+    STORAGE_VERSION,
     API_ENDPOINTS,
     CONF_ACCESS_ID,
     CONF_ACCESS_KEY,
@@ -31,43 +47,66 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+_REPORT_CACHE_SIZE = 128
+_REPORT_CACHE_TTL = 3600  # seconds
+_BODY_TYPES = {
+    0: "Underweight",
+    1: "Normal",
+    2: "Overweight",
+    3: "Obese",
+    4: "Severely Obese",
+}
+_MAX_CONCURRENT_REQUESTS = 4
+_PAGE_SIZE = 50
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10)
+_TOKEN_REFRESH_AHEAD = 60  # seconds before expiry
+# Tuya error codes for rejected credentials: sign invalid, client id invalid,
+# token invalid, token expired
+_AUTH_ERROR_CODES = frozenset({1004, 1005, 1010, 1011})
+
+def _is_auth_error(result: dict) -> bool:
+    """Return True if a failed Tuya reply rejects the credentials or token."""
+    return (
+        result.get('code') in _AUTH_ERROR_CODES
+        or 'token' in str(result.get('msg', '')).lower()
+    )
+
+@lru_cache(maxsize=1024)
+def _format_datetime(timestamp_ms: int) -> str:
+    # The latest measurement rarely changes between polls, so formatting is memoized
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp_ms // 1000))
+
 class APIRateLimiter:
     """Rate limiter for API requests."""
     def __init__(self, calls: int = 60, period: int = 60):
         self.calls = calls
         self.period = period
-        self.requests = []
+        # Ring buffer holding the start times of the last `calls` requests
+        self._ts = array('d', [float("-inf")] * calls)
+        self._head = 0
 
     async def wait_if_needed(self):
-        now = datetime.utcnow()
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < timedelta(seconds=self.period)]
-        if len(self.requests) >= self.calls:
-            sleep_time = (self.requests[0] + timedelta(seconds=self.period) - now).total_seconds()
-            if sleep_time > 0:
-                _LOGGER.debug("Rate limit exceeded, waiting %s seconds", sleep_time)
-                await asyncio.sleep(sleep_time)
-        self.requests.append(now)
-
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=4, max=10)
-)
-def make_api_request(url: str, headers: dict, data: str = "", timeout: int = 10) -> requests.Response:
-    _LOGGER.debug("Making API request to %s with headers %s", url, headers)
-    try:
-        if data:
-            return requests.post(url, headers=headers, data=data, timeout=timeout)
-        return requests.get(url, headers=headers, timeout=timeout)
-    except requests.exceptions.Timeout:
-        _LOGGER.error("Request timeout for URL: %s", url)
-        raise
-    except requests.exceptions.ConnectionError:
-        _LOGGER.error("Connection error for URL: %s", url)
-        raise
-    except Exception as err:
-        _LOGGER.error("Unexpected error in API request: %s", str(err))
-        raise
+        now = time.monotonic()
+        sleep_time = self._ts[self._head] + self.period - now
+        # Claim the slot before sleeping so concurrent callers queue behind it
+        self._ts[self._head] = now + max(sleep_time, 0)
+        self._head = (self._head + 1) % self.calls
+        if sleep_time > 0:
+            _LOGGER.debug("Rate limit exceeded, waiting %s seconds", sleep_time)
+            await asyncio.sleep(sleep_time)
+
+class TuyaAPIError(Exception):
+    """Error returned by or while talking to the Tuya API."""
+
+
+class TuyaAuthError(TuyaAPIError):
+    """Access token could not be obtained or was rejected."""
+
+
+# Tuya rate limits are per account, so limiters are shared by access_id across config entries
+_LIMITERS: dict[str, APIRateLimiter] = {}
+_SEMAPHORES: dict[str, asyncio.Semaphore] = {}
 
 class TuyaScaleAPI:
     """Tuya Scale API client."""
@@ -76,141 +115,226 @@ class TuyaScaleAPI:
         self.hass = hass
         self._access_id = config[CONF_ACCESS_ID]
         self._access_key = config[CONF_ACCESS_KEY]
+        self._access_id_bytes = self._access_id.encode('utf-8')
+        self._access_key_bytes = self._access_key.encode('utf-8')
         self._device_id = config[CONF_DEVICE_ID]
         self._api_endpoint = API_ENDPOINTS[config["region"]]
         self._token = None
+        self._token_bytes = b""
         self._token_expires = 0
-        self._rate_limiter = APIRateLimiter()
+        self._token_lock = asyncio.Lock()
+        self._refresh_ahead = False
+        self._unsub_token_refresh = None
+        if self._access_id not in _LIMITERS:
+            _LIMITERS[self._access_id] = APIRateLimiter(60, 60)
+            _SEMAPHORES[self._access_id] = asyncio.Semaphore(_MAX_CONCURRENT_REQUESTS)
+        self._rate_limiter = _LIMITERS[self._access_id]
+        self._sem = _SEMAPHORES[self._access_id]
+        self._base_headers = {'client_id': self._access_id, 'sign_method': 'HMAC-SHA256'}
+        self._base_post_headers = {**self._base_headers, 'Content-Type': 'application/json'}
+        self._sign_prefix_get = f"GET\n{_EMPTY_SHA256}\n\n".encode('utf-8')
+        self._history_path_tmpl = (
+            f"/v1.0/scales/{self._device_id}/datas/history?page_no={{}}&page_size={_PAGE_SIZE}"
+        )
+        self._analysis_path = f"/v1.0/scales/{self._device_id}/analysis-reports"
+        self._report_cache: dict[tuple, tuple[float, dict]] = {}
+        self._report_inflight: dict[tuple, asyncio.Task] = {}
+        self._session = async_get_clientsession(hass)
+        self._store = Store(hass, STORAGE_VERSION, f"{DOMAIN}_{self._device_id}_token")
+
+    async def async_load_token(self) -> None:
+        """Restore a previously stored access token if it is still valid."""
+        data = await self._store.async_load()
+        # The stored expiry is wall-clock time so it stays meaningful across restarts
+        if data and data["expires"] > time.time() + 60:
+            self._set_token(data["token"], data["expires"] - time.time())
+            _LOGGER.debug("Restored access token from storage")
+
+    def _set_token(self, token: str, expires_in: float) -> None:
+        """Store the access token along with its pre-encoded form for signing."""
+        self._token = token
+        self._token_bytes = token.encode('utf-8')
+        self._token_expires = time.monotonic() + expires_in
+        if self._refresh_ahead:
+            self._schedule_token_refresh()
+
+    @callback
+    def async_start_token_refresh(self) -> None:
+        """Renew the token in the background shortly before it expires."""
+        self._refresh_ahead = True
+        if self._token:
+            self._schedule_token_refresh()
 
-    def _calculate_sign(self, t: str, path: str, access_token: str = None, body: str = "") -> str:
+    @callback
+    def async_stop_token_refresh(self) -> None:
+        """Cancel any scheduled background token renewal."""
+        self._refresh_ahead = False
+        if self._unsub_token_refresh:
+            self._unsub_token_refresh()
+            self._unsub_token_refresh = None
+
+    def _schedule_token_refresh(self) -> None:
+        if self._unsub_token_refresh:
+            self._unsub_token_refresh()
+        delay = max(self._token_expires - time.monotonic() - _TOKEN_REFRESH_AHEAD, 0)
+        self._unsub_token_refresh = async_call_later(
+            self.hass, delay, self._async_refresh_token
+        )
+
+    async def _async_refresh_token(self, _now) -> None:
+        self._unsub_token_refresh = None
         try:
-            str_to_sign = []
-            str_to_sign.append("GET" if not body else "POST")
-            str_to_sign.append(hashlib.sha256(body.encode('utf8')).hexdigest())
-            str_to_sign.append("")
-            str_to_sign.append(path)
-            str_to_sign = '\n'.join(str_to_sign)
-            message = self._access_id
-            if access_token:
-                message += access_token
-            message += t + str_to_sign
-            signature = hmac.new(
-                self._access_key.encode('utf-8'),
-                message.encode('utf-8'),
-                hashlib.sha256
-            ).hexdigest().upper()
-            _LOGGER.debug(
-                "Signature calculation:\n"
-                "String to sign: %s\n"
-                "Message: %s\n"
-                "Signature: %s",
-                str_to_sign, message, signature
-            )
-            return signature
+            await self._get_token(force=True)
         except Exception as err:
-            _LOGGER.error("Error generating signature: %s", str(err))
-            raise
+            # _get_token already logged the error; the next API call will
+            # fetch a token on demand instead
+            _LOGGER.debug("Background token refresh failed: %s", err)
 
-    async def _get_token(self) -> None:
-        try:
-            await self._rate_limiter.wait_if_needed()
-            t = str(int(time.time() * 1000))
-            path = "/v1.0/token?grant_type=1"
-            sign = self._calculate_sign(t, path)
-            headers = {
-                'client_id': self._access_id,
-                'sign': sign,
-                't': t,
-                'sign_method': 'HMAC-SHA256'
-            }
-            url = f"{self._api_endpoint}{path}"
-            _LOGGER.debug(
-                "Getting token\n"
-                "URL: %s\n"
-                "Headers: %s",
-                url, json.dumps(headers, indent=2)
-            )
-            response = await self.hass.async_add_executor_job(
-                make_api_request,
-                url,
-                headers
-            )
-            _LOGGER.debug("Token response: %s", response.text)
-            if response.status_code != 200:
-                _LOGGER.error(
-                    "Token request failed\n"
-                    "Status code: %s\n"
-                    "Response: %s",
-                    response.status_code, response.text
+    async def _make_request(self, method: str, url: str, headers: dict, body: bytes = b"") -> tuple[int, dict | None]:
+        """Send a request over the shared session, returning status and parsed JSON."""
+        _LOGGER.debug("Making API request to %s with headers %s", url, headers)
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(3),
+            wait=wait_exponential(multiplier=1, min=4, max=10),
+            reraise=True,
+        ):
+            with attempt:
+                async with self._sem, self._session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    data=body or None,
+                    timeout=_REQUEST_TIMEOUT,
+                ) as resp:
+                    if resp.status != 200:
+                        if _LOGGER.isEnabledFor(logging.DEBUG):
+                            _LOGGER.debug("Response: %s", await resp.text())
+                        return resp.status, None
+                    raw = await resp.read()
+        # Parse outside the retry loop: a malformed body is not worth retrying
+        return 200, _json_loads(raw)
+
+    def _calculate_sign(self, t: str, path: str, access_token: bytes = b"", body: bytes = b"") -> str:
+        if not body:
+            str_to_sign = self._sign_prefix_get + path.encode('utf-8')
+        else:
+            content_hash = hashlib.sha256(body).hexdigest()
+            str_to_sign = f"POST\n{content_hash}\n\n{path}".encode('utf-8')
+        message = b"".join((
+            self._access_id_bytes,
+            access_token,
+            t.encode('utf-8'),
+            str_to_sign,
+        ))
+        signature = hmac.digest(self._access_key_bytes, message, 'sha256').hex().upper()
+        _LOGGER.debug(
+            "Signature calculation:\n"
+            "String to sign: %s\n"
+            "Message: %s\n"
+            "Signature: %s",
+            str_to_sign, message, signature
+        )
+        return signature
+
+    async def _get_token(self, _internal: bool = False, force: bool = False) -> None:
+        async with self._token_lock:
+            # Another caller may have refreshed the token while we waited for the lock
+            if not force and self._token and time.monotonic() < self._token_expires - 30:
+                return
+            try:
+                if not _internal:
+                    await self._rate_limiter.wait_if_needed()
+                t = str(time.time_ns() // 1_000_000)
+                path = "/v1.0/token?grant_type=1"
+                sign = self._calculate_sign(t, path)
+                headers = {**self._base_headers, 'sign': sign, 't': t}
+                url = f"{self._api_endpoint}{path}"
+                _LOGGER.debug(
+                    "Getting token\n"
+                    "URL: %s\n"
+                    "Headers: %s",
+                    url, headers
                 )
-                raise Exception(ERROR_AUTH)
-            result = response.json()
-            if not result.get('success', False):
-                _LOGGER.error("Token request error: %s", result.get('msg'))
-                raise Exception(ERROR_AUTH)
-            self._token = result['result']['access_token']
-            self._token_expires = time.time() + result['result']['expire_time']
-            _LOGGER.debug("Got access token: %s", self._token)
-        except Exception as err:
-            _LOGGER.error("Error getting token: %s", str(err))
-            raise
+                status, result = await self._make_request("GET", url, headers)
+                if status != 200:
+                    _LOGGER.error(
+                        "Token request failed\n"
+                        "Status code: %s",
+                        status
+                    )
+                    # Only a 401 means the credentials were refused; 5xx/429 are outages
+                    if status == 401:
+                        raise TuyaAuthError(ERROR_AUTH)
+                    raise TuyaAPIError(f"HTTP error {status}")
+                if not result.get('success', False):
+                    _LOGGER.error("Token request error: %s", result.get('msg'))
+                    if _is_auth_error(result):
+                        raise TuyaAuthError(ERROR_AUTH)
+                    raise TuyaAPIError(f"API error: {result.get('msg', '')}")
+                self._set_token(
+                    result['result']['access_token'],
+                    result['result']['expire_time'],
+                )
+                _LOGGER.debug("Got access token: %s", self._token)
+                await self._store.async_save(
+                    {"token": self._token, "expires": time.time() + result['result']['expire_time']}
+                )
+            except Exception as err:
+                _LOGGER.error("Error getting token: %s", str(err))
+                raise
 
-    async def _api_request(self, method: str, path: str, body: str = "") -> dict:
+    async def _api_request(self, method: str, path: str, body: bytes = b"") -> dict:
+        url = f"{self._api_endpoint}{path}"
         try:
-            await self._rate_limiter.wait_if_needed()
-            if not self._token or time.time() >= self._token_expires:
-                await self._get_token()
-            t = str(int(time.time() * 1000))
-            sign = self._calculate_sign(t, path, self._token, body)
-            headers = {
-                'client_id': self._access_id,
-                'access_token': self._token,
-                'sign': sign,
-                't': t,
-                'sign_method': 'HMAC-SHA256'
-            }
-            if body:
-                headers["Content-Type"] = "application/json"
-            url = f"{self._api_endpoint}{path}"
-            _LOGGER.debug(
-                "Making API request - Method: %s\n"
-                "URL: %s\n"
-                "Headers: %s\n"
-                "Body: %s",
-                method, url, json.dumps(headers, indent=2), body
-            )
-            response = await self.hass.async_add_executor_job(
-                make_api_request,
-                url,
-                headers,
-                body
-            )
-            _LOGGER.debug("API response: %s", response.text)
-            if response.status_code == 401:
-                _LOGGER.info("Token expired, refreshing...")
-                self._token = None
-                return await self._api_request(method, path, body)
-            if response.status_code != 200:
-                raise Exception(f"HTTP error {response.status_code}")
-            try:
-                result = response.json()
-            except json.JSONDecodeError:
-                _LOGGER.error("Invalid JSON response from API: %s", response.text)
-                raise Exception("Invalid JSON response from API")
-            if not result.get('success', False):
-                msg = result.get('msg', '')
-                if 'token' in msg.lower() or 'unknown error' in msg.lower():
-                    _LOGGER.info("Token invalid or unknown error, refreshing token...")
+            for attempt in range(2):
+                await self._rate_limiter.wait_if_needed()
+                if not self._token or time.monotonic() >= self._token_expires:
+                    await self._get_token(_internal=True)
+                t = str(time.time_ns() // 1_000_000)
+                sign = self._calculate_sign(t, path, self._token_bytes, body)
+                headers = {
+                    **(self._base_post_headers if body else self._base_headers),
+                    'access_token': self._token,
+                    'sign': sign,
+                    't': t,
+                }
+                _LOGGER.debug(
+                    "Making API request - Method: %s\n"
+                    "URL: %s\n"
+                    "Headers: %s\n"
+                    "Body: %s",
+                    method, url, headers, body
+                )
+                try:
+                    status, result = await self._make_request(method, url, headers, body)
+                except json.JSONDecodeError:
+                    _LOGGER.error("Invalid JSON response from API: %s", url)
+                    raise TuyaAPIError("Invalid JSON response from API")
+                if status == 401:
+                    _LOGGER.info("Token expired, refreshing...")
                     self._token = None
-                    return await self._api_request(method, path, body)
-                raise Exception(f"API error: {msg}")
-            return result["result"]
-        except requests.exceptions.Timeout:
+                    rejected = TuyaAuthError("API error: token rejected after refresh")
+                    continue
+                if status != 200:
+                    raise TuyaAPIError(f"HTTP error {status}")
+                if not result.get('success', False):
+                    msg = result.get('msg', '')
+                    if 'token' in msg.lower() or 'unknown error' in msg.lower():
+                        _LOGGER.info("Token invalid or unknown error, refreshing token...")
+                        self._token = None
+                        rejected = (
+                            TuyaAuthError if _is_auth_error(result) else TuyaAPIError
+                        )(f"API error: {msg}")
+                        continue
+                    raise TuyaAPIError(f"API error: {msg}")
+                return result["result"]
+            raise rejected
+        except asyncio.TimeoutError:
             _LOGGER.error("API request timed out: %s", url)
-            raise Exception("API request timed out")
-        except requests.exceptions.ConnectionError:
+            raise TuyaAPIError("API request timed out")
+        except aiohttp.ClientConnectionError:
             _LOGGER.error("Connection error occurred: %s", url)
-            raise Exception("Connection error occurred")
+            raise TuyaAPIError("Connection error occurred")
         except Exception as err:
             _LOGGER.error("API request failed: %s", str(err))
             raise
@@ -218,53 +342,111 @@ class TuyaScaleAPI:
     async def get_scale_records(self, max_pages: int = 5) -> dict:
         """Get scale records from multiple pages."""
         all_records = []
-        page_no = 1
-        page_size = 50
-        while page_no <= max_pages:
-            try:
-                path = f"/v1.0/scales/{self._device_id}/datas/history?page_no={page_no}&page_size={page_size}"
-                result = await self._api_request("GET", path)
-                records = result.get("records", [])
-                _LOGGER.debug("Page %d: Found %d records", page_no, len(records))
-                if not records:
-                    break
-                all_records.extend(records)
-                if len(records) < page_size:
-                    break
-                page_no += 1
-            except Exception as err:
-                _LOGGER.error("Error fetching page %d: %s", page_no, str(err))
+        # Page 1 usually holds everything; the remaining pages are only
+        # requested (concurrently) when it comes back full
+        try:
+            first = await self._api_request("GET", self._history_path_tmpl.format(1))
+        except Exception as err:
+            first = err
+        results = [first]
+        if (max_pages > 1 and isinstance(first, dict)
+                and len(first.get("records") or []) >= _PAGE_SIZE):
+            results.extend(await asyncio.gather(
+                *(
+                    self._api_request("GET", self._history_path_tmpl.format(page_no))
+                    for page_no in range(2, max_pages + 1)
+                ),
+                return_exceptions=True,
+            ))
+        for page_no, result in enumerate(results, start=1):
+            if isinstance(result, TuyaAuthError):
+                raise result
+            if isinstance(result, Exception):
+                _LOGGER.error("Error fetching page %d: %s", page_no, str(result))
                 # Hata olursa exception fırlat!
-                raise Exception(f"API error on page {page_no}: {err}")
+                raise TuyaAPIError(f"API error on page {page_no}: {result}")
+            records = result.get("records") or []
+            _LOGGER.debug("Page %d: Found %d records", page_no, len(records))
+            if not records:
+                break
+            all_records.extend(records)
+            if len(records) < _PAGE_SIZE:
+                break
         if not all_records:
             # Hiç veri alınamazsa da exception fırlat
-            raise Exception("No records fetched from API.")
+            raise TuyaAPIError("No records fetched from API.")
         _LOGGER.debug("Total records fetched: %d from %d pages", len(all_records), page_no)
         return {"records": all_records}
 
+    @staticmethod
+    def _report_key(data: dict) -> tuple:
+        """Return the inputs that fully determine an analysis report."""
+        return (
+            int(data["height"]),
+            round(float(data["weight"]), 2),
+            int(data["resistance"]),
+            int(data["age"]),
+            int(data["sex"]),
+        )
+
+    async def get_analysis_reports(self, items: list[dict]) -> list[dict | Exception]:
+        """Get analysis reports for several measurements in one call.
+
+        Tuya has no batch analysis endpoint, so identical measurements are
+        requested once and the remaining ones are sent concurrently. Results
+        line up with ``items``; failed entries hold the raised exception.
+        """
+        unique: dict[tuple, dict] = {}
+        keys: list[tuple | Exception] = []
+        for data in items:
+            # A bad value only fails its own entry, not the whole batch
+            try:
+                key = self._report_key(data)
+            except (KeyError, TypeError, ValueError) as err:
+                keys.append(err)
+                continue
+            unique.setdefault(key, data)
+            keys.append(key)
+        reports = await asyncio.gather(
+            *(self.get_analysis_report(data) for data in unique.values()),
+            return_exceptions=True,
+        )
+        by_key = dict(zip(unique, reports))
+        return [key if isinstance(key, Exception) else by_key[key] for key in keys]
+
     async def get_analysis_report(self, data: dict) -> dict:
-        path = f"/v1.0/scales/{self._device_id}/analysis-reports"
-        body = json.dumps({
+        # Reports only depend on these inputs, so repeat measurements are served from cache
+        key = self._report_key(data)
+        cached = self._report_cache.get(key)
+        if cached is not None and time.monotonic() - cached[0] < _REPORT_CACHE_TTL:
+            return cached[1]
+        # Identical concurrent requests share the one already on the wire
+        task = self._report_inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch_analysis_report(key, data))
+            self._report_inflight[key] = task
+            task.add_done_callback(lambda _: self._report_inflight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _fetch_analysis_report(self, key: tuple, data: dict) -> dict:
+        body = _json_dumps({
             "height": int(data["height"]),
             "weight": float(data["weight"]),
             "resistance": int(data["resistance"]),
             "age": int(data["age"]),
             "sex": int(data["sex"])
         })
-        return await self._api_request("POST", path, body)
+        report = await self._api_request("POST", self._analysis_path, body)
+        self._report_cache.pop(key, None)
+        if len(self._report_cache) >= _REPORT_CACHE_SIZE:
+            self._report_cache.pop(next(iter(self._report_cache)))
+        self._report_cache[key] = (time.monotonic(), report)
+        return report
 
     @staticmethod
     def format_datetime(timestamp_ms: int) -> str:
-        dt = datetime.fromtimestamp(timestamp_ms / 1000)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        return _format_datetime(timestamp_ms)
 
     @staticmethod
     def format_body_type(body_type: int) -> str:
-        types = {
-            0: "Underweight",
-            1: "Normal",
-            2: "Overweight",
-            3: "Obese",
-            4: "Severely Obese"
-        }
-        return types.get(body_type, str(body_type))
+        return _BODY_TYPES.get(body_type, str(body_type))
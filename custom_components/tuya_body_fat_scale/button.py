@@ -1,6 +1,7 @@
 """Support for Tuya Body Fat Scale buttons."""
 from __future__ import annotations
 import logging
+import re
 
 from homeassistant.components.button import ButtonEntity
 from homeassistant.config_entries import ConfigEntry
@@ -16,6 +17,14 @@ from .coordinator import TuyaScaleDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+# Türkçe karakterleri düzelt
+_TR_TABLE = str.maketrans({
+    'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
+    'İ': 'i', 'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c',
+    ' ': '_'
+})
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9]+')
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -100,20 +109,7 @@ class TuyaScaleRefreshButton(ButtonEntity):
 
     def _clean_name(self, name: str) -> str:
         """Clean name for use in entity_id."""
-        import re
-        # Türkçe karakterleri düzelt
-        replacements = {
-            'ı': 'i', 'ğ': 'g', 'ü': 'u', 'ş': 's', 'ö': 'o', 'ç': 'c',
-            'İ': 'i', 'Ğ': 'g', 'Ü': 'u', 'Ş': 's', 'Ö': 'o', 'Ç': 'c',
-            ' ': '_'
-        }
-        
-        for old, new in replacements.items():
-            name = name.replace(old, new)
-        
-        clean = re.sub(r'[^a-z0-9_]', '_', name.lower())
-        clean = re.sub(r'_+', '_', clean)
-        return clean.strip('_')
+        return _NON_ALNUM_RE.sub('_', name.translate(_TR_TABLE).lower()).strip('_')
 
     async def async_press(self) -> None:
         """Handle the button press - refreshes ALL user data."""
@@ -28,7 +28,7 @@ from .const import (
     ERROR_UNKNOWN,
     CONF_API_ERROR_NOTIFICATION,  # eklendi
 )
-from .api import TuyaScaleAPI
+from .api import TuyaAuthError, TuyaScaleAPI
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -100,7 +100,7 @@ class TuyaScaleConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
             except Exception as err:
                 _LOGGER.error("Failed to connect to Tuya API: %s", str(err))
-                if "token" in str(err).lower():
+                if isinstance(err, TuyaAuthError):
                     errors["base"] = "invalid_auth"
                 else:
                     errors["base"] = "cannot_connect"
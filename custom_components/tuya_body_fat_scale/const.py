@@ -1,4 +1,9 @@
 """Constants for the Tuya Body Fat Scale integration."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
 from typing import Final
 
 DOMAIN: Final = "tuya_body_fat_scale"
@@ -15,6 +20,9 @@ CONF_API_ERROR_NOTIFICATION = "api_error_notification"  # <-- eklendi
 
 BUTTON_REFRESH = "refresh_data"
 
+# Storage
+STORAGE_VERSION = 1
+
 # Configuration Defaults
 DEFAULT_SCAN_INTERVAL = 300  # 5 minutes
 
@@ -43,155 +51,37 @@ GENDER_OPTIONS = {
 }
 
 # Sensor Types
-SENSOR_TYPES = {
-    "user_id": {
-        "name": "User ID",
-        "icon": "mdi:identifier",
-        "unit": None,
-        "state_class": None,
-        "device_class": None
-    },
-    "name": {
-        "name": "Name",
-        "icon": "mdi:account",
-        "unit": None,
-        "state_class": None,
-        "device_class": None
-    },
-    "birth_date": {
-        "name": "Birth Date",
-        "icon": "mdi:calendar",
-        "unit": None,
-        "state_class": None,
-        "device_class": None
-    },
-    "age": {
-        "name": "Age",
-        "icon": "mdi:counter",
-        "unit": "years",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "gender": {
-        "name": "Gender",
-        "icon": "mdi:gender-male-female",
-        "unit": None,
-        "state_class": None,
-        "device_class": None
-    },
-    "height": {
-        "name": "Height",
-        "icon": "mdi:human-male-height",
-        "unit": "cm",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "weight": {
-        "name": "Weight",
-        "icon": "mdi:scale-bathroom",
-        "unit": "kg",
-        "state_class": "measurement",
-        "device_class": "weight"
-    },
-    "resistance": {
-        "name": "Resistance",
-        "icon": "mdi:omega",
-        "unit": "Ω",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "last_measurement": {
-        "name": "Last Measurement",
-        "icon": "mdi:clock",
-        "unit": None,
-        "state_class": None,
-        "device_class": "timestamp"
-    },
-    "body_type": {
-        "name": "Body Type",
-        "icon": "mdi:human",
-        "unit": None,
-        "state_class": None,
-        "device_class": None
-    },
-    "fat_free_mass": {
-        "name": "Fat Free Mass",
-        "icon": "mdi:weight",
-        "unit": "kg",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "body_water": {
-        "name": "Body Water",
-        "icon": "mdi:water-percent",
-        "unit": "%",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "body_score": {
-        "name": "Body Score",
-        "icon": "mdi:medal",
-        "unit": None,
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "bone_mass": {
-        "name": "Bone Mass",
-        "icon": "mdi:bone",
-        "unit": "kg",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "muscle_mass": {
-        "name": "Muscle Mass",
-        "icon": "mdi:arm-flex",
-        "unit": "kg",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "protein": {
-        "name": "Protein",
-        "icon": "mdi:food-steak",
-        "unit": "%",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "body_fat": {
-        "name": "Body Fat",
-        "icon": "mdi:percent",
-        "unit": "%",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "basal_metabolism": {
-        "name": "Basal Metabolism",
-        "icon": "mdi:fire",
-        "unit": "kcal",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "visceral_fat": {
-        "name": "Visceral Fat",
-        "icon": "mdi:stomach",
-        "unit": None,
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "body_age": {
-        "name": "Body Age",
-        "icon": "mdi:human-child",
-        "unit": "years",
-        "state_class": "measurement",
-        "device_class": None
-    },
-    "bmi": {
-        "name": "BMI",
-        "icon": "mdi:human-male-height-variant",
-        "unit": "kg/m²",
-        "state_class": "measurement",
-        "device_class": None
-    }
-}
+@dataclass(frozen=True, slots=True)
+class SensorType:
+    """Static description of a sensor type."""
+
+    name: str
+    icon: str
+
+
+SENSOR_TYPES: Mapping[str, SensorType] = MappingProxyType({
+    "user_id": SensorType("User ID", "mdi:identifier"),
+    "name": SensorType("Name", "mdi:account"),
+    "birth_date": SensorType("Birth Date", "mdi:calendar"),
+    "age": SensorType("Age", "mdi:counter"),
+    "gender": SensorType("Gender", "mdi:gender-male-female"),
+    "height": SensorType("Height", "mdi:human-male-height"),
+    "weight": SensorType("Weight", "mdi:scale-bathroom"),
+    "resistance": SensorType("Resistance", "mdi:omega"),
+    "last_measurement": SensorType("Last Measurement", "mdi:clock"),
+    "body_type": SensorType("Body Type", "mdi:human"),
+    "fat_free_mass": SensorType("Fat Free Mass", "mdi:weight"),
+    "body_water": SensorType("Body Water", "mdi:water-percent"),
+    "body_score": SensorType("Body Score", "mdi:medal"),
+    "bone_mass": SensorType("Bone Mass", "mdi:bone"),
+    "muscle_mass": SensorType("Muscle Mass", "mdi:arm-flex"),
+    "protein": SensorType("Protein", "mdi:food-steak"),
+    "body_fat": SensorType("Body Fat", "mdi:percent"),
+    "basal_metabolism": SensorType("Basal Metabolism", "mdi:fire"),
+    "visceral_fat": SensorType("Visceral Fat", "mdi:stomach"),
+    "body_age": SensorType("Body Age", "mdi:human-child"),
+    "bmi": SensorType("BMI", "mdi:human-male-height-variant"),
+})
 
 # Error messages
 ERROR_AUTH = "Authentication failed. Please check your credentials."
@@ -8,7 +8,8 @@ Changes:
 """
 
 import logging
-from datetime import datetime, timedelta
+import time
+from datetime import date, datetime, timedelta, timezone
 import async_timeout
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.update_coordinator import (
@@ -17,7 +18,7 @@ from homeassistant.helpers.update_coordinator import (
 )
 from homeassistant.exceptions import ConfigEntryAuthFailed
 
-from .api import TuyaScaleAPI
+from .api import TuyaAPIError, TuyaAuthError, TuyaScaleAPI
 from .const import (
     DOMAIN,
     ERROR_AUTH,
@@ -27,6 +28,48 @@ from .const import (
 
 _LOGGER = logging.getLogger(__name__)
 
+# Sensor key -> analysis report field
+_REPORT_FIELDS = (
+    ("fat_free_mass", "ffm"),
+    ("body_water", "water"),
+    ("body_score", "body_score"),
+    ("bone_mass", "bones"),
+    ("muscle_mass", "muscle"),
+    ("protein", "protein"),
+    ("body_fat", "fat"),
+    ("basal_metabolism", "metabolism"),
+    ("visceral_fat", "visceral_fat"),
+    ("body_age", "body_age"),
+    ("bmi", "bmi"),
+)
+_BODY_TYPE_KEYS = {
+    0: "underweight",
+    1: "normal",
+    2: "overweight",
+    3: "obese",
+    4: "severely_obese",
+}
+# Identical API error notifications are not repeated within this window (seconds)
+_NOTIFY_INTERVAL = 600
+# Failed refreshes back off up to this multiple of the scan interval
+_MAX_BACKOFF_FACTOR = 8
+# Cached data older than this (seconds) is no longer served on failure
+_MAX_STALE = 7200
+
+def _process_resistance(resistance_value) -> int:
+    """Return resistance in ohms; values below 1 are reported in kΩ."""
+    try:
+        resistance = float(resistance_value)
+        return int(resistance * 1000) if resistance < 1 else int(resistance)
+    except (ValueError, TypeError):
+        _LOGGER.warning("Invalid resistance value: %s", resistance_value)
+        return 0
+
+def _measurement_time(create_time: int) -> datetime:
+    """Return the UTC datetime for a record's create_time (local wall time shifted back 3 hours)."""
+    local_dt = datetime.fromtimestamp(create_time // 1000)
+    return (local_dt - timedelta(hours=3)).replace(tzinfo=timezone.utc)
+
 class TuyaScaleDataUpdateCoordinator(DataUpdateCoordinator):
     """Class to manage fetching Tuya Scale data."""
 
@@ -40,39 +83,105 @@ class TuyaScaleDataUpdateCoordinator(DataUpdateCoordinator):
         """Initialize global Tuya Scale data updater."""
         self.api = api
         self.config_entry = config_entry
-        self.user_data = config_entry.data.get(CONF_USERS, {})
         self._last_success_data = None
+        self._last_create_time: dict[str, int] = {}
+        self._last_notify_err: str | None = None
+        self._last_notify_ts = 0.0
+        self._last_success_ts = 0.0
+        self._failure_count = 0
+        self._normal_interval = timedelta(seconds=update_interval)
+        self.rebuild_user_cache()
         self.hass = hass  # Bildirim göndermek için kaydediyoruz
 
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=self._normal_interval,
         )
 
         _LOGGER.debug("Initialized coordinator with users: %s", self.user_data)
 
-    def _process_resistance(self, resistance_value: str) -> int:
-        try:
-            resistance_float = float(resistance_value)
-            if resistance_float < 1:
-                return int(resistance_float * 1000)
-            return int(resistance_float)
-        except (ValueError, TypeError):
-            _LOGGER.warning("Invalid resistance value: %s", resistance_value)
-            return 0
+    def rebuild_user_cache(self) -> None:
+        """Reload configured users and their precomputed fields from the config entry."""
+        self.user_data = self.config_entry.data.get(CONF_USERS, {})
+        # Per-user fields that only change when the config entry is edited
+        self._user_cache = {
+            user_id: {
+                "birth_date_obj": datetime.strptime(user_info["birth_date"], "%d.%m.%Y"),
+                "sex_int": 1 if user_info["gender"] == "M" else 2,
+                "static_fields": {
+                    "user_id": user_id,
+                    "birth_date": user_info["birth_date"],
+                    "gender": "male" if user_info["gender"] == "M" else "female",
+                },
+            }
+            for user_id, user_info in self.user_data.items()
+        }
+        self._age_cache: dict[str, tuple[date, int]] = {}
+        # Force a fresh analysis for everyone on the next refresh
+        self._last_create_time.clear()
+
+    def set_scan_interval(self, seconds: int) -> None:
+        """Change the normal polling interval, dropping any failure backoff."""
+        self._normal_interval = timedelta(seconds=seconds)
+        self._failure_count = 0
+        self.update_interval = self._normal_interval
+
+    def _record_success(self, data: dict) -> dict:
+        """Remember successfully fetched data and return to normal polling."""
+        self._last_success_data = data
+        self._last_success_ts = time.monotonic()
+        if self._failure_count:
+            self._failure_count = 0
+            self.update_interval = self._normal_interval
+        return data
 
     def _format_body_type_key(self, body_type: int) -> str:
         """Format body type as translation key (lowercase)."""
-        types = {
-            0: "underweight",
-            1: "normal", 
-            2: "overweight",
-            3: "obese",
-            4: "severely_obese"
+        return _BODY_TYPE_KEYS.get(body_type, "normal")
+
+    def _get_age(self, user_id: str) -> int:
+        """Return the user's age, recomputed at most once per day."""
+        today = date.today()
+        cached = self._age_cache.get(user_id)
+        if cached is not None and cached[0] == today:
+            return cached[1]
+        age = (datetime.now() - self._user_cache[user_id]["birth_date_obj"]).days // 365
+        self._age_cache[user_id] = (today, age)
+        return age
+
+    def _prepare_user(self, user_id: str, record: dict) -> dict:
+        """Build the analysis request inputs for a user's latest record."""
+        weight = record.get("weight", record.get("wegith", 0))
+        height = record.get("height", 170)
+        resistance = record.get("resistance", record.get("body_r", 0))
+
+        return {
+            "height": height,
+            "weight": weight,
+            "resistance": _process_resistance(resistance),
+            "age": self._get_age(user_id),
+            "sex": self._user_cache[user_id]["sex_int"]
         }
-        return types.get(body_type, "normal")
+
+    def _build_user_data(self, user_id: str, record: dict, analysis_data: dict, report: dict) -> dict:
+        """Build the sensor data for a user from their record and analysis report."""
+        create_time = record.get("create_time", 0)
+        data = {
+            **self._user_cache[user_id]["static_fields"],
+            "name": self.user_data[user_id].get("name", record.get("nick_name", "Unknown")),
+            "age": analysis_data["age"],
+            "height": analysis_data["height"],
+            "weight": analysis_data["weight"],
+            "resistance": analysis_data["resistance"],
+            "last_measurement": _measurement_time(create_time),
+            "last_measurement_local": self.api.format_datetime(create_time),
+            "body_type": self._format_body_type_key(report.get("body_type", 0)),  # DEĞİŞTİ: key format
+            **{key: report.get(report_key, 0) for key, report_key in _REPORT_FIELDS},
+        }
+        _LOGGER.debug("Processed data for user %s: %s", user_id, data)
+        return data
 
     async def _async_update_data(self) -> dict:
         try:
@@ -81,69 +190,68 @@ class TuyaScaleDataUpdateCoordinator(DataUpdateCoordinator):
                 records = await self.api.get_scale_records(max_pages=5)
                 _LOGGER.debug("Received records: %s", records)
 
-                user_records = {}
-                for record in records.get("records", []):
+                # Latest (create_time, record) per configured user
+                latest: dict[str, tuple[int, dict]] = {}
+                user_data = self.user_data
+                for record in records.get("records") or ():
                     user_id = record.get("user_id")
-                    if not user_id or user_id not in self.user_data:
+                    if not user_id or user_id not in user_data:
                         continue
 
-                    current_timestamp = record.get("create_time", 0)
-                    if (user_id not in user_records or 
-                        current_timestamp > user_records[user_id].get("create_time", 0)):
-                        user_records[user_id] = record
+                    create_time = record.get("create_time", 0)
+                    previous = latest.get(user_id)
+                    if previous is None or create_time > previous[0]:
+                        latest[user_id] = (create_time, record)
+
+                # Only users with a newer measurement (or a birthday) need a new analysis
+                last = self._last_success_data or {}
+                changed = {
+                    user_id: entry
+                    for user_id, entry in latest.items()
+                    if user_id not in last
+                    or entry[0] > self._last_create_time.get(user_id, 0)
+                    or last[user_id]["age"] != self._get_age(user_id)
+                }
+                if not changed and self._last_success_data is not None:
+                    _LOGGER.debug("No new measurements, keeping previous data")
+                    return self._record_success(self._last_success_data)
 
-                results = {}
-                for user_id, record in user_records.items():
+                # Pass 1: derive the analysis inputs for every changed user
+                prepared = []
+                for user_id, (create_time, record) in changed.items():
                     try:
-                        user_info = self.user_data[user_id]
-                        birth_date = datetime.strptime(user_info["birth_date"], "%d.%m.%Y")
-                        age = (datetime.now() - birth_date).days // 365
-
-                        weight = record.get("weight", record.get("wegith", 0))
-                        height = record.get("height", 170)
-                        resistance = record.get("resistance", record.get("body_r", 0))
-                        processed_resistance = self._process_resistance(resistance)
-
-                        analysis_data = {
-                            "height": height,
-                            "weight": weight,
-                            "resistance": processed_resistance,
-                            "age": age,
-                            "sex": 1 if user_info["gender"] == "M" else 2
-                        }
-
-                        _LOGGER.debug("Getting analysis for user %s with data: %s", user_id, analysis_data)
-                        report = await self.api.get_analysis_report(analysis_data)
-
-                        results[user_id] = {
-                            "user_id": user_id,
-                            "name": user_info.get("name", record.get("nick_name", "Unknown")),
-                            "birth_date": user_info["birth_date"],
-                            "age": age,
-                            "gender": "male" if user_info["gender"] == "M" else "female",  # DEĞİŞTİ: küçük harf
-                            "height": height,
-                            "weight": weight,
-                            "resistance": processed_resistance,
-                            "last_measurement": self.api.format_datetime(record.get("create_time", 0)),
-                            "body_type": self._format_body_type_key(report.get("body_type", 0)),  # DEĞİŞTİ: key format
-                            "fat_free_mass": report.get("ffm", 0),
-                            "body_water": report.get("water", 0),
-                            "body_score": report.get("body_score", 0),
-                            "bone_mass": report.get("bones", 0),
-                            "muscle_mass": report.get("muscle", 0),
-                            "protein": report.get("protein", 0),
-                            "body_fat": report.get("fat", 0),
-                            "basal_metabolism": report.get("metabolism", 0),
-                            "visceral_fat": report.get("visceral_fat", 0),
-                            "body_age": report.get("body_age", 0),
-                            "bmi": report.get("bmi", 0)
-                        }
-                        _LOGGER.debug("Processed data for user %s: %s", user_id, results[user_id])
+                        analysis_data = self._prepare_user(user_id, record)
                     except Exception as err:
                         _LOGGER.error("Error processing user %s: %s", user_id, str(err))
+                        continue
+                    _LOGGER.debug("Getting analysis for user %s with data: %s", user_id, analysis_data)
+                    prepared.append((user_id, create_time, record, analysis_data))
 
-                self._last_success_data = results
-                return results
+                # Pass 2: request all analysis reports in one batch
+                reports = await self.api.get_analysis_reports(
+                    [analysis_data for *_, analysis_data in prepared]
+                )
+                # The analysis endpoint failed for every updated user: count it as a
+                # failed refresh so the backoff, notification and stale-data limit apply
+                if reports and all(isinstance(report, TuyaAPIError) for report in reports):
+                    raise reports[0]
+
+                # Pass 3: combine records and reports into sensor data
+                results = {
+                    user_id: last[user_id]
+                    for user_id in latest
+                    if user_id not in changed
+                }
+                for (user_id, create_time, record, analysis_data), report in zip(prepared, reports):
+                    try:
+                        if isinstance(report, Exception):
+                            raise report
+                        results[user_id] = self._build_user_data(user_id, record, analysis_data, report)
+                        self._last_create_time[user_id] = create_time
+                    except Exception as err:
+                        _LOGGER.error("Error processing user %s: %s", user_id, str(err))
+
+                return self._record_success(results)
 
         except Exception as err:
             _LOGGER.error("Error fetching data: %s", err)
@@ -153,21 +261,37 @@ class TuyaScaleDataUpdateCoordinator(DataUpdateCoordinator):
                 if hasattr(self.config_entry, "options")
                 else True
             )
-            if should_notify:
+            message = str(err)
+            now = time.monotonic()
+            if should_notify and (
+                message != self._last_notify_err
+                or now - self._last_notify_ts >= _NOTIFY_INTERVAL
+            ):
+                self._last_notify_err = message
+                self._last_notify_ts = now
                 self.hass.async_create_task(
                     self.hass.services.async_call(
                         "persistent_notification",
                         "create",
                         {
                             "title": "Tuya Body Fat Scale API Uyarısı",
-                            "message": f"```\n{str(err)}\n```"
+                            "message": f"```\n{message}\n```",
+                            "notification_id": f"{DOMAIN}_api_error",
                         },
                         blocking=False,
                     )
                 )
-            if "token" in str(err).lower():
-                raise ConfigEntryAuthFailed(ERROR_AUTH)
-            if self._last_success_data is not None:
+            # Poll less often while the API keeps failing
+            self._failure_count += 1
+            self.update_interval = self._normal_interval * min(
+                2 ** (self._failure_count - 1), _MAX_BACKOFF_FACTOR
+            )
+            if isinstance(err, TuyaAuthError):
+                raise ConfigEntryAuthFailed(ERROR_AUTH) from err
+            if (
+                self._last_success_data is not None
+                and time.monotonic() - self._last_success_ts < _MAX_STALE
+            ):
                 _LOGGER.warning("Returning cached data due to API failure.")
                 return self._last_success_data
             raise UpdateFailed(f"Error communicating with API: {err}")
@@ -1,7 +1,7 @@
 """Support for Tuya Body Fat Scale sensors."""
 from __future__ import annotations
 import logging
-from datetime import datetime, timezone, timedelta
+import re
 
 from homeassistant.components.sensor import (
     SensorEntity,
@@ -32,6 +32,26 @@ from .coordinator import TuyaScaleDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9_]')
+_MULTI_UNDERSCORE_RE = re.compile(r'_+')
+
+_MASS_KEYS = ("weight", "bone_mass", "muscle_mass", "fat_free_mass")
+_UNITS = {
+    **dict.fromkeys(_MASS_KEYS, UnitOfMass.KILOGRAMS),
+    **dict.fromkeys(("body_water", "protein", "body_fat"), PERCENTAGE),
+    "height": UnitOfLength.CENTIMETERS,
+    "basal_metabolism": UnitOfEnergy.KILO_CALORIE,
+}
+_DEVICE_CLASSES = {
+    "last_measurement": SensorDeviceClass.TIMESTAMP,
+    **dict.fromkeys(_MASS_KEYS, SensorDeviceClass.WEIGHT),
+}
+_STATE_CLASSES = dict.fromkeys(
+    ("weight", "bmi", "body_fat", "body_water", "protein",
+     "bone_mass", "muscle_mass", "fat_free_mass", "basal_metabolism"),
+    SensorStateClass.MEASUREMENT,
+)
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -111,11 +131,12 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
             model="Body Fat Scale"
         )
         
-        # Set sensor specific attributes from SENSOR_TYPES
+        # Set sensor specific attributes
         sensor_info = SENSOR_TYPES[sensor_key]
-        self._attr_device_class = sensor_info.get("device_class")
-        self._attr_state_class = sensor_info.get("state_class")
-        self._attr_icon = sensor_info.get("icon")
+        self._attr_native_unit_of_measurement = _UNITS.get(sensor_key)
+        self._attr_device_class = _DEVICE_CLASSES.get(sensor_key)
+        self._attr_state_class = _STATE_CLASSES.get(sensor_key)
+        self._attr_icon = sensor_info.icon
         
         # Set translation key for the entity
         self._attr_translation_key = sensor_key
@@ -133,11 +154,10 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
             name = name.replace(old, new)
         
         # Then convert to lowercase and replace spaces and special characters with underscore
-        import re
-        clean = re.sub(r'[^a-z0-9_]', '_', name.lower())
+        clean = _NON_ALNUM_RE.sub('_', name.lower())
         
         # Remove consecutive underscores
-        clean = re.sub(r'_+', '_', clean)
+        clean = _MULTI_UNDERSCORE_RE.sub('_', clean)
         
         # Remove leading and trailing underscores
         clean = clean.strip('_')
@@ -163,18 +183,6 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
             user_data = self.coordinator.data[self._user_id]
             value = user_data.get(self._sensor_key)
         
-            # Format specific values
-            if self._sensor_key == "last_measurement":
-                try:
-                    if isinstance(value, str):
-                        local_dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                        # Convert to UTC by subtracting 3 hours
-                        utc_dt = local_dt - timedelta(hours=3)
-                        return utc_dt.replace(tzinfo=timezone.utc)
-                    return None
-                except (ValueError, TypeError):
-                    return None
-            
             # Gender ve body_type translation key'lerini döndür
             # Coordinator artık "male"/"female" ve "underweight"/"normal" gibi key'ler döndürüyor
             # Bu yüzden direkt value'yu döndürebiliriz
@@ -209,36 +217,6 @@ class TuyaScaleSensor(CoordinatorEntity, SensorEntity):
                 
             # Add last_measurement to all sensors except itself
             if self._sensor_key != "last_measurement":
-                attrs["last_measurement"] = user_data.get("last_measurement")
+                attrs["last_measurement"] = user_data.get("last_measurement_local")
             
         return attrs
-
-    @property
-    def native_unit_of_measurement(self) -> str | None:
-        """Return the unit of measurement."""
-        if self._sensor_key in ["weight", "bone_mass", "muscle_mass", "fat_free_mass"]:
-            return UnitOfMass.KILOGRAMS
-        elif self._sensor_key in ["body_water", "protein", "body_fat"]:
-            return PERCENTAGE
-        elif self._sensor_key == "height":
-            return UnitOfLength.CENTIMETERS
-        elif self._sensor_key == "basal_metabolism":
-            return UnitOfEnergy.KILO_CALORIE
-        return None
-
-    @property
-    def device_class(self) -> str | None:
-        """Return the device class."""
-        if self._sensor_key == "last_measurement":
-            return SensorDeviceClass.TIMESTAMP
-        elif self._sensor_key in ["weight", "bone_mass", "muscle_mass", "fat_free_mass"]:
-            return SensorDeviceClass.WEIGHT
-        return None
-
-    @property
-    def state_class(self) -> str | None:
-        """Return the state class."""
-        if self._sensor_key in ["weight", "bmi", "body_fat", "body_water", "protein",
-                              "bone_mass", "muscle_mass", "fat_free_mass", "basal_metabolism"]:
-            return SensorStateClass.MEASUREMENT
-        return None
@@ -2,8 +2,14 @@ import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
 def resolve_api_endpoint(endpoint_input):
     region_map = {
         "cn": "https://openapi.tuyacn.com",
@@ -18,12 +24,8 @@ def sign_request(access_id, access_key, method, path, t, token=None, body=""):
     content_sha256 = hashlib.sha256(body.encode('utf8')).hexdigest()
     string_to_sign = f"{method}\n{content_sha256}\n\n{path}"
     message = access_id + (token or "") + t + string_to_sign
-    signature = hmac.new(
-        access_key.encode("utf-8"),
-        message.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+    signature = hmac.digest(access_key.encode("utf-8"), message.encode("utf-8"), "sha256")
+    return signature.hex().upper()
 
 def get_token(access_id, access_key, api_endpoint):
     path = "/v1.0/token?grant_type=1"
@@ -36,7 +38,7 @@ def get_token(access_id, access_key, api_endpoint):
         "t": t,
         "sign_method": "HMAC-SHA256"
     }
-    response = requests.get(url, headers=headers)
+    response = _SESSION.get(url, headers=headers)
     response.raise_for_status()
     result = response.json()
     return result["result"]["access_token"]
@@ -55,7 +57,7 @@ def get_device_properties(access_id, access_key, api_endpoint, token, device_id)
         "Content-Type": "application/json",
         "access_token": token
     }
-    response = requests.get(url, headers=headers)
+    response = _SESSION.get(url, headers=headers)
     response.raise_for_status()
     return response.json()
 
@@ -1,10 +1,45 @@
+import re
 import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import json
-from datetime import datetime, timezone
-from dateutil.relativedelta import relativedelta
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from operator import attrgetter
+from datetime import date, datetime, timezone
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    _json_loads = json.loads
+
+_DATE_RE = re.compile(r"(\d{1,2})\.(\d{1,2})\.(\d{4})")
+_EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+# History pages and analysis reports are independent, so a few run at once
+_MAX_WORKERS = 4
+_EXECUTOR = ThreadPoolExecutor(max_workers=_MAX_WORKERS)
+_PAGE_SIZE = 50
+# Analysis futures by request body, kept across runs of main()
+_REPORTS = {}
+_BODY_TYPES = {
+    0: "Underweight",
+    1: "Normal",
+    2: "Overweight",
+    3: "Obese",
+    4: "Severely Obese"
+}
 
 def resolve_api_endpoint(endpoint_input):
     region_map = {
@@ -33,8 +68,13 @@ def get_user_details(user_name):
             while True:
                 birth_date = input("Birth Date (DD.MM.YYYY): ").strip()
                 try:
-                    birth_date = datetime.strptime(birth_date, "%d.%m.%Y")
-                    age = relativedelta(datetime.now(), birth_date).years
+                    match = _DATE_RE.fullmatch(birth_date)
+                    if not match:
+                        raise ValueError(birth_date)
+                    day, month, year = map(int, match.groups())
+                    birth_date = date(year, month, day)
+                    today = date.today()
+                    age = today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
                     if 0 <= age <= 120:
                         break
                     else:
@@ -59,95 +99,134 @@ def get_user_details(user_name):
                 return None
 
 def get_user_info_from_record(record):
-    user_name = record.get('nick_name', 'Unknown')
+    user_name = record.nick_name
     print(f"\n{'='*50}")
     print(f"User found: {user_name}")
     return get_user_details(user_name)
 
-def sign_request(access_id, access_key, method, path, t, token=None, body=""):
-    content_sha256 = hashlib.sha256(body.encode('utf8')).hexdigest()
-    string_to_sign = f"{method}\n{content_sha256}\n\n{path}"
-    message = access_id + (token or "") + t + string_to_sign
-    signature = hmac.new(
-        access_key.encode("utf-8"),
-        message.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
-
-def get_token(access_id, access_key, api_endpoint):
-    path = "/v1.0/token?grant_type=1"
-    url = f"{api_endpoint}{path}"
-    t = str(int(time.time() * 1000))
-    sign = sign_request(access_id, access_key, "GET", path, t)
-    headers = {
-        "client_id": access_id,
-        "sign": sign,
-        "t": t,
-        "sign_method": "HMAC-SHA256"
-    }
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    result = response.json()
-    return result["result"]["access_token"]
+class TuyaError(Exception):
+    """Tuya API response with success set to false."""
 
-def get_all_records(access_id, access_key, api_endpoint, token, device_id, page_no=1, page_size=50):
-    path = f"/v1.0/scales/{device_id}/datas/history?page_no={page_no}&page_size={page_size}"
-    url = f"{api_endpoint}{path}"
-    t = str(int(time.time() * 1000))
-    sign = sign_request(access_id, access_key, "GET", path, t, token)
-    headers = {
-        "client_id": access_id,
-        "access_token": token,
-        "sign": sign,
-        "t": t,
-        "sign_method": "HMAC-SHA256"
-    }
-    response = requests.get(url, headers=headers)
+    def __init__(self, msg, code=None):
+        super().__init__(f"API Error: {msg}")
+        self.msg = msg
+        self.code = code
+
+@dataclass(frozen=True, slots=True)
+class ScaleRecord:
+    """History record fields used by this script."""
+
+    user_id: str | None
+    time_int: int
+    height: int | None
+    weight: float | None
+    body_r: float | None
+    nick_name: str
+    create_time: int | None
+
+    @classmethod
+    def from_api(cls, record):
+        return cls(
+            user_id=record.get("user_id"),
+            time_int=record.get("time_int", 0),
+            height=record.get("height"),
+            # Some firmware reports the weight under a misspelled key
+            weight=record.get("wegith", record.get("weight")),
+            body_r=record.get("body_r"),
+            nick_name=record.get("nick_name", "Unknown"),
+            create_time=record.get("create_time"),
+        )
+
+class TuyaSigner:
+    """Sign requests with the key and client prefix encoded once per session."""
+
+    def __init__(self, access_id, access_key):
+        self.access_id = access_id
+        self.token = None
+        self._key = access_key.encode("utf-8")
+        self._prefix = access_id.encode("utf-8")
+
+    def set_token(self, token):
+        self.token = token
+        self._prefix = (self.access_id + token).encode("utf-8")
+
+    def sign(self, method, path, t, body=b""):
+        content_sha256 = hashlib.sha256(body).hexdigest() if body else _EMPTY_SHA256
+        message = b"".join((
+            self._prefix, t.encode(), method.encode(), b"\n",
+            content_sha256.encode(), b"\n\n", path.encode("utf-8"),
+        ))
+        return hmac.digest(self._key, message, "sha256").hex().upper()
+
+def _signed_request(signer, api_endpoint, method, path, body=b""):
+    t = str(time.time_ns() // 1_000_000)
+    headers = {"sign": signer.sign(method, path, t, body), "t": t}
+    if body:
+        headers["Content-Type"] = "application/json"
+    response = _SESSION.request(method, f"{api_endpoint}{path}", headers=headers, data=body or None)
     response.raise_for_status()
-    result = response.json()
+    result = _json_loads(response.content)
     if not result.get("success"):
-        raise Exception(f"API Error: {result.get('msg', 'Unknown error')}")
-    return result["result"]["records"]
+        raise TuyaError(result.get("msg", "Unknown error"), result.get("code"))
+    return result["result"]
 
-def get_analysis_report(access_id, access_key, api_endpoint, token, device_id, height, weight, resistance, age, sex):
-    path = f"/v1.0/scales/{device_id}/analysis-reports"
-    url = f"{api_endpoint}{path}"
-    body_json = {
+def get_token(signer, api_endpoint):
+    return _signed_request(signer, api_endpoint, "GET", "/v1.0/token?grant_type=1")["access_token"]
+
+def get_all_records(signer, api_endpoint, device_id, page_no=1, page_size=50):
+    path = f"/v1.0/scales/{device_id}/datas/history?page_no={page_no}&page_size={page_size}"
+    return _signed_request(signer, api_endpoint, "GET", path)["records"]
+
+def fetch_all_records(signer, api_endpoint, device_id):
+    records = []
+    page_no = 1
+    while True:
+        pages = _EXECUTOR.map(
+            lambda p: get_all_records(signer, api_endpoint, device_id, page_no=p, page_size=_PAGE_SIZE),
+            range(page_no, page_no + _MAX_WORKERS),
+        )
+        for page_records in pages:
+            records.extend(map(ScaleRecord.from_api, page_records))
+            if len(page_records) < _PAGE_SIZE:
+                return records
+        page_no += _MAX_WORKERS
+
+def analysis_body(record, user):
+    height = record.height
+    weight = record.weight
+    resistance = record.body_r
+    age = user['age']
+    sex = user['sex']
+    if not all([height, weight, resistance, age is not None, sex is not None]):
+        return None
+    return _json_dumps({
         "height": int(height),
         "weight": float(weight),
         "resistance": int(float(resistance) * 1000),
         "age": int(age),
         "sex": int(sex)
-    }
-    body = json.dumps(body_json)
-    t = str(int(time.time() * 1000))
-    sign = sign_request(access_id, access_key, "POST", path, t, token, body)
-    headers = {
-        "client_id": access_id,
-        "access_token": token,
-        "sign": sign,
-        "t": t,
-        "sign_method": "HMAC-SHA256",
-        "Content-Type": "application/json"
-    }
-    response = requests.post(url, headers=headers, data=body)
-    response.raise_for_status()
-    return response.json()
+    })
 
+def get_analysis_report(signer, api_endpoint, device_id, body):
+    path = f"/v1.0/scales/{device_id}/analysis-reports"
+    return _signed_request(signer, api_endpoint, "POST", path, body)
+
+def submit_analysis_report(signer, api_endpoint, device_id, body):
+    key = (device_id, body)
+    future = _REPORTS.get(key)
+    # Failed requests are retried; pending and successful ones are shared
+    if future is None or (future.done() and future.exception()):
+        future = _EXECUTOR.submit(get_analysis_report, signer, api_endpoint, device_id, body)
+        _REPORTS[key] = future
+    return future
+
+@lru_cache(maxsize=1024)
 def format_datetime(timestamp_ms):
     dt = datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc)
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
 def format_body_type(body_type):
-    types = {
-        0: "Underweight",
-        1: "Normal",
-        2: "Overweight",
-        3: "Obese",
-        4: "Severely Obese"
-    }
-    return types.get(body_type, str(body_type))
+    return _BODY_TYPES.get(body_type, str(body_type))
 
 def main():
     try:
@@ -156,104 +235,94 @@ def main():
         print(f"Current Date and Time (UTC): {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}\n")
 
         print("🔐 Getting token...")
-        token = get_token(access_id, access_key, api_endpoint)
+        # Constant headers live on the session; requests only add sign and t
+        _SESSION.headers.update({"client_id": access_id, "sign_method": "HMAC-SHA256"})
+        _SESSION.headers.pop("access_token", None)
+        signer = TuyaSigner(access_id, access_key)
+        signer.set_token(get_token(signer, api_endpoint))
+        _SESSION.headers["access_token"] = signer.token
         print("✅ Token received successfully.\n")
 
         print("📡 Fetching scale records...")
-        records = []
-        page_no = 1
-        while True:
-            page_records = get_all_records(access_id, access_key, api_endpoint, token, device_id, page_no=page_no, page_size=50)
-            if not page_records:
-                break
-            records.extend(page_records)
-            if len(page_records) < 50:
-                break
-            page_no += 1
+        records = fetch_all_records(signer, api_endpoint, device_id)
 
         if not records:
             print("❌ No records found.")
             return
 
-        user_last_records = {}
-        for record in records:
-            user_id = record.get("user_id")
-            if not user_id:
-                continue
-            current_last = user_last_records.get(user_id)
-            if not current_last or record.get("time_int", 0) > current_last.get("time_int", 0):
-                user_last_records[user_id] = record
+        # Sorted oldest first, so each user's newest record is written last
+        records.sort(key=attrgetter("time_int"))
+        user_last_records = {r.user_id: r for r in records if r.user_id}
 
         print(f"\n✅ {len(user_last_records)} unique users found.\n")
 
         user_info = {}
+        bodies = {}
+        reports = {}
         for user_id, record in user_last_records.items():
             user_details = get_user_info_from_record(record)
             if user_details:
                 user_info[user_id] = user_details
+                try:
+                    body = bodies[user_id] = analysis_body(record, user_details)
+                except (TypeError, ValueError) as e:
+                    print(f"❌ Error: {str(e)}")
+                    body = bodies[user_id] = None
+                # Start the report now so it runs while the next user is prompted
+                if body is not None:
+                    reports[user_id] = submit_analysis_report(signer, api_endpoint, device_id, body)
 
         for user_id, record in user_last_records.items():
             if user_id not in user_info:
-                print(f"\n⚠️ Skipping analysis for {record.get('nick_name', 'Unknown')} due to missing user info.")
+                print(f"\n⚠️ Skipping analysis for {record.nick_name} due to missing user info.")
                 continue
 
-            print(f"\n{'='*50}")
+            # Collect the report and write it in one go
+            out = [f"\n{'='*50}"]
 
             current_user = user_info[user_id]
             try:
-                height = record.get("height")
-                weight = record.get("wegith", record.get("weight"))
-                resistance = record.get("body_r")
-                age = current_user['age']
-                sex = current_user['sex']
-
-                if all([height, weight, resistance, age is not None, sex is not None]):
-                    body_json = {
-                        "height": int(height),
-                        "weight": float(weight),
-                        "resistance": int(float(resistance) * 1000),
-                        "age": int(age),
-                        "sex": int(sex)
-                    }
-                    body = json.dumps(body_json)
-                    print(f"Current Date and Time (UTC): {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    print("🔍 Debug - Sent data:", body)
-                    print("\n📊 Body Analysis Report:")
-                    print(f"\n🆔 User ID: {user_id}")
-                    print(f"👤 Name: {record.get('nick_name', 'Unknown')}")
-                    print(f"🎂 Birth Date: {current_user.get('birth_date', 'Unknown')}")
-                    print(f"👥 Age: {current_user['age']}")
-                    print(f"⚧  Gender: {'Female' if current_user['sex'] == 2 else 'Male'}")
-                    print(f"📏 Height: {height} cm")
-                    print(f"⚖️ Weight: {weight} kg")
-                    print(f"📊 Resistance: {resistance}")
-                    create_time = record.get("create_time")
+                body = bodies[user_id]
+                if body is not None:
+                    out.append(f"Current Date and Time (UTC): {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')}\n")
+                    out.append(f"🔍 Debug - Sent data: {body.decode()}")
+                    out.append("\n📊 Body Analysis Report:")
+                    out.append(f"\n🆔 User ID: {user_id}")
+                    out.append(f"👤 Name: {record.nick_name}")
+                    out.append(f"🎂 Birth Date: {current_user.get('birth_date', 'Unknown')}")
+                    out.append(f"👥 Age: {current_user['age']}")
+                    out.append(f"⚧  Gender: {'Female' if current_user['sex'] == 2 else 'Male'}")
+                    out.append(f"📏 Height: {record.height} cm")
+                    out.append(f"⚖️ Weight: {record.weight} kg")
+                    out.append(f"📊 Resistance: {record.body_r}")
+                    create_time = record.create_time
                     if create_time:
                         formatted_time = format_datetime(create_time)
-                        print(f"🕒 Last Measurement Time (UTC): {formatted_time}")
-                    result = get_analysis_report(access_id, access_key, api_endpoint, token, device_id, height, weight, resistance, age, sex)
-                    if result.get("success"):
-                        data = result["result"]
-                        print(f"\n⚖️ Body Type: {format_body_type(data.get('body_type', '-'))}")
-                        print(f"⚖️ Weight: {data.get('weight', '-')} kg")
-                        print(f"💪 Fat-Free Mass: {data.get('ffm', '-')} kg")
-                        print(f"💧 Body Water: {data.get('water', '-')}%")
-                        print(f"📈 Body Score: {data.get('body_score', '-')}")
-                        print(f"🦴 Bone Mass: {data.get('bones', '-')} kg")
-                        print(f"💪 Muscle Mass: {data.get('muscle', '-')} kg")
-                        print(f"🥩 Protein: {data.get('protein', '-')}%")
-                        print(f"🏃 Body Fat: {data.get('fat', '-')}%")
-                        print(f"🔥 Basal Metabolism: {data.get('metabolism', '-')} kcal")
-                        print(f"🎯 Visceral Fat: {data.get('visceral_fat', '-')}")
-                        print(f"⏳ Body Age: {data.get('body_age', '-')}")
-                        print(f"📏 BMI: {data.get('bmi', '-')}")
+                        out.append(f"🕒 Last Measurement Time (UTC): {formatted_time}")
+                    try:
+                        data = reports[user_id].result()
+                    except Exception as e:
+                        out.append(f"\n❌ Failed to get analysis report: {str(e)}")
                     else:
-                        print(f"\n❌ Failed to get analysis report: {result.get('msg', 'Unknown error')}")
+                        out.append(f"\n⚖️ Body Type: {format_body_type(data.get('body_type', '-'))}")
+                        out.append(f"⚖️ Weight: {data.get('weight', '-')} kg")
+                        out.append(f"💪 Fat-Free Mass: {data.get('ffm', '-')} kg")
+                        out.append(f"💧 Body Water: {data.get('water', '-')}%")
+                        out.append(f"📈 Body Score: {data.get('body_score', '-')}")
+                        out.append(f"🦴 Bone Mass: {data.get('bones', '-')} kg")
+                        out.append(f"💪 Muscle Mass: {data.get('muscle', '-')} kg")
+                        out.append(f"🥩 Protein: {data.get('protein', '-')}%")
+                        out.append(f"🏃 Body Fat: {data.get('fat', '-')}%")
+                        out.append(f"🔥 Basal Metabolism: {data.get('metabolism', '-')} kcal")
+                        out.append(f"🎯 Visceral Fat: {data.get('visceral_fat', '-')}")
+                        out.append(f"⏳ Body Age: {data.get('body_age', '-')}")
+                        out.append(f"📏 BMI: {data.get('bmi', '-')}")
                 else:
-                    print("\n⚠️ Analysis report unavailable due to missing data.")
+                    out.append("\n⚠️ Analysis report unavailable due to missing data.")
             except Exception as e:
-                print(f"\n❌ Error: {str(e)}")
-            print(f"\n{'='*50}\n")
+                out.append(f"\n❌ Error: {str(e)}")
+            out.append(f"\n{'='*50}\n")
+            print("\n".join(out))
     except Exception as e:
         print(f"\n❌ An error occurred: {str(e)}")
     finally:
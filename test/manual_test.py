@@ -2,8 +2,21 @@ import time
 import hmac
 import hashlib
 import requests
+from requests.adapters import HTTPAdapter
 import json
 
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+_SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+_SESSION.mount("http://", _ADAPTER)
+_SESSION.mount("https://", _ADAPTER)
+
 def resolve_api_endpoint(endpoint_input):
     region_map = {
         "cn": "https://openapi.tuyacn.com",
@@ -14,16 +27,12 @@ def resolve_api_endpoint(endpoint_input):
     endpoint_input = endpoint_input.strip().lower()
     return region_map.get(endpoint_input, endpoint_input)
 
-def sign_request(access_id, access_key, method, path, t, token=None, body=""):
-    content_sha256 = hashlib.sha256(body.encode('utf8')).hexdigest()
+def sign_request(access_id, access_key, method, path, t, token=None, body=b""):
+    content_sha256 = hashlib.sha256(body).hexdigest()
     string_to_sign = f"{method}\n{content_sha256}\n\n{path}"
     message = access_id + (token or "") + t + string_to_sign
-    signature = hmac.new(
-        access_key.encode("utf-8"),
-        message.encode("utf-8"),
-        hashlib.sha256
-    ).hexdigest().upper()
-    return signature
+    signature = hmac.digest(access_key.encode("utf-8"), message.encode("utf-8"), "sha256")
+    return signature.hex().upper()
 
 def get_token(access_id, access_key, api_endpoint):
     path = "/v1.0/token?grant_type=1"
@@ -36,7 +45,7 @@ def get_token(access_id, access_key, api_endpoint):
         "t": t,
         "sign_method": "HMAC-SHA256"
     }
-    response = requests.get(url, headers=headers)
+    response = _SESSION.get(url, headers=headers)
     response.raise_for_status()
     result = response.json()
     return result["result"]["access_token"]
@@ -51,7 +60,7 @@ def get_analysis_report(access_id, access_key, api_endpoint, token, device_id, h
         "age": int(age),
         "sex": int(sex)
     }
-    body = json.dumps(body_json)
+    body = _json_dumps(body_json)
     t = str(int(time.time() * 1000))
     sign = sign_request(access_id, access_key, "POST", path, t, token, body)
     headers = {
@@ -62,7 +71,7 @@ def get_analysis_report(access_id, access_key, api_endpoint, token, device_id, h
         "sign_method": "HMAC-SHA256",
         "Content-Type": "application/json"
     }
-    response = requests.post(url, headers=headers, data=body)
+    response = _SESSION.post(url, headers=headers, data=body)
     response.raise_for_status()
     return response.json()
 